@@ -1,7 +1,8 @@
 import os
 import requests
-import json
+import orjson
 import argparse
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from typing import Dict, Any, List, Optional
 import logging
@@ -21,28 +22,47 @@ if not API_KEY:
 
 FIRECRAWL_API_URL = "https://api.firecrawl.dev/scrape"
 
-def scrape_website(url: str, selector: Optional[str] = None, 
-                  wait_for: Optional[str] = None, 
-                  scroll_to_bottom: bool = False) -> Dict[str, Any]:
+# Built once at import; identical for every request
+_HEADERS = {
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {API_KEY}"
+}
+
+# Shared session so repeated calls reuse the same TLS connection to the API
+_SESSION = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=4,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"],
+        respect_retry_after_header=True,
+    ),
+)
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
+def scrape_website(url: str, selector: Optional[str] = None,
+                  wait_for: Optional[str] = None,
+                  scroll_to_bottom: bool = False,
+                  dump_debug: bool = False) -> Dict[str, Any]:
     """
     Scrape a website using the Firecrawl API
-    
+
     Args:
         url: The URL to scrape
         selector: Optional CSS selector to wait for before capturing content
         wait_for: Optional time in milliseconds to wait after page load
         scroll_to_bottom: Whether to scroll to the bottom of the page
-        
+        dump_debug: Whether to save the response to debug files (CLI only)
+
     Returns:
         Dictionary containing the scraped data
     """
-    logger.info(f"Scraping URL: {url}")
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-    
+    logger.info("Scraping URL: %s", url)
+
     # Build the request payload
     payload = {
         "url": url,
@@ -52,11 +72,11 @@ def scrape_website(url: str, selector: Optional[str] = None,
     # Add optional parameters if provided
     if selector:
         payload["options"]["waitForSelector"] = selector
-        logger.info(f"Waiting for selector: {selector}")
+        logger.info("Waiting for selector: %s", selector)
         
     if wait_for:
         payload["options"]["waitFor"] = wait_for
-        logger.info(f"Wait time configured: {wait_for}ms")
+        logger.info("Wait time configured: %sms", wait_for)
         
     if scroll_to_bottom:
         payload["options"]["scrollToBottom"] = True
@@ -64,35 +84,40 @@ def scrape_website(url: str, selector: Optional[str] = None,
     
     try:
         # Make the API request
-        response = requests.post(
+        response = _SESSION.post(
             FIRECRAWL_API_URL,
-            headers=headers,
-            json=payload
+            headers=_HEADERS,
+            json=payload,
+            timeout=(5, 60)  # (connect, read) - never hang on a stuck worker
         )
         
         # Check if the request was successful
         if response.status_code == 200:
             logger.info("Successfully retrieved data from Firecrawl API")
-            result = response.json()
-            
-            # Save the HTML content to a file for inspection
-            with open("scraped_content.html", "w", encoding="utf-8") as f:
-                f.write(result.get("html", ""))
-            logger.info("Saved HTML content to 'scraped_content.html'")
-            
-            # Save full response to a JSON file
-            with open("firecrawl_response.json", "w", encoding="utf-8") as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
-            logger.info("Saved full response to 'firecrawl_response.json'")
+            result = orjson.loads(response.content)
+
+            if dump_debug:
+                # Save the HTML content to a file for inspection
+                # (binary + 64KB buffer keeps large pages to a handful of write syscalls)
+                with open("scraped_content.html", "wb", buffering=65536) as f:
+                    f.write(result.get("html", "").encode("utf-8"))
+                logger.info("Saved HTML content to 'scraped_content.html'")
+
+                # Save the response to a JSON file, minus the HTML we already
+                # wrote above - no point keeping a second copy of the page
+                slim_result = {k: v for k, v in result.items() if k != "html"}
+                with open("firecrawl_response.json", "wb") as f:
+                    f.write(orjson.dumps(slim_result, option=orjson.OPT_INDENT_2))
+                logger.info("Saved full response to 'firecrawl_response.json'")
             
             return result
         else:
-            logger.error(f"Error: API request failed with status code {response.status_code}")
-            logger.error(f"Response: {response.text}")
+            logger.error("Error: API request failed with status code %s", response.status_code)
+            logger.error("Response: %s", response.text)
             return {"error": f"API request failed: {response.text}"}
             
     except Exception as e:
-        logger.error(f"Error making request to Firecrawl API: {str(e)}")
+        logger.error("Error making request to Firecrawl API: %s", str(e))
         return {"error": str(e)}
 
 def parse_arguments():
@@ -114,7 +139,8 @@ def main():
         url=args.url,
         selector=args.selector,
         wait_for=args.wait,
-        scroll_to_bottom=args.scroll
+        scroll_to_bottom=args.scroll,
+        dump_debug=True
     )
     
     if "error" not in result:
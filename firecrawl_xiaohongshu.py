@@ -1,9 +1,14 @@
 import os
 import requests
-import json
+import orjson
 import argparse
+import asyncio
+import aiohttp
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from bs4 import BeautifulSoup
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from typing import Dict, Any, List, Optional
 import logging
@@ -23,7 +28,62 @@ if not API_KEY:
     raise ValueError("No API_KEY found in .env file")
 
 FIRECRAWL_API_URL = "https://api.firecrawl.dev/scrape"
+FIRECRAWL_BATCH_API_URL = "https://api.firecrawl.dev/batch/scrape"
 
+# 每次请求的headers完全相同，导入时构建一次
+_HEADERS = {
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {API_KEY}"
+}
+
+# 预编译extract_xhs_url用到的正则，避免每次调用重新查找/编译
+_XHSLINK_RE = re.compile(r'http://xhslink\.com/[a-zA-Z0-9/]+')
+_XHS_FULL_RE = re.compile(r'https://www\.xiaohongshu\.com/explore/[a-zA-Z0-9]+(?:\?[^,\s]*)?')
+# 笔记ID为16/24/32位字母数字串；单次扫描替代按长度的三次扫描，
+# 前后断言保证匹配的是完整的字母数字串而非长串内部的片段
+_NOTE_ID_UNIFIED = re.compile(r'(?<![a-zA-Z0-9])[a-zA-Z0-9]{16,32}(?![a-zA-Z0-9])')
+_BAD_TOKEN = re.compile(r'http|com|www|xhs', re.I)
+
+# @符号和表情符号一次translate全部去掉，只扫描一遍字符串
+_STRIP_TABLE = {ord('@'): None}
+_STRIP_TABLE.update({cp: None for cp in range(0x1F300, 0x1FA00)})
+
+# 文件夹名里的非法字符统一换成下划线；固定8个ASCII字符，translate比正则快
+_FS_SANITIZE = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# 每次请求的爬取选项完全相同，只有url字段在变
+_XHS_PAYLOAD_OPTIONS = {
+    "waitForSelector": "meta[property='og:title']",
+    "scrollToBottom": True,
+    "waitFor": "2000"  # Wait 2 seconds to ensure content is loaded
+}
+
+# 返回结果的字段及默认值
+_RESULT_SCHEMA = (
+    ("title", ""),
+    ("content", ""),
+    ("hashtags", []),
+    ("interaction_info", {"likes": "0", "comments": "0", "collects": "0"}),
+    ("images", []),
+)
+
+# Shared session so repeated calls reuse the same TLS connection to the API
+_SESSION = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=4,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"],
+        respect_retry_after_header=True,
+    ),
+)
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
+@lru_cache(maxsize=4096)
 def extract_xhs_url(share_text: str) -> str:
     """
     从分享文本中提取小红书链接
@@ -31,55 +91,55 @@ def extract_xhs_url(share_text: str) -> str:
     1. http://xhslink.com/xxx
     2. https://www.xiaohongshu.com/explore/xxx
     3. 从分享文本中提取笔记ID
+
+    结果按分享文本做LRU缓存（纯函数，重复提交直接命中；
+    命中时函数体里的日志不会重复输出）
     """
     # 移除@符号和表情符号（如果存在）
-    share_text = share_text.replace('@', '')
-    share_text = re.sub(r'[\U0001F300-\U0001F9FF]', '', share_text)
-    
+    # 纯ASCII文本（桌面端复制的短链接）不可能含表情，直接走replace快路径
+    if share_text.isascii():
+        share_text = share_text.replace('@', '')
+    else:
+        share_text = share_text.translate(_STRIP_TABLE)
+
     # 先尝试匹配小红书短链接
-    xhslink_pattern = r'http://xhslink\.com/[a-zA-Z0-9/]+'
-    xhslink_match = re.search(xhslink_pattern, share_text)
+    xhslink_match = _XHSLINK_RE.search(share_text)
     if xhslink_match:
         short_url = xhslink_match.group(0)
-        logger.info(f"Found short link: {short_url}")
+        logger.info("Found short link: %s", short_url)
         return short_url
-    
+
     # 如果没有找到短链接，尝试匹配完整链接
-    xiaohongshu_pattern = r'https://www\.xiaohongshu\.com/explore/[a-zA-Z0-9]+(?:\?[^,\s]*)?'
-    xiaohongshu_match = re.search(xiaohongshu_pattern, share_text)
+    xiaohongshu_match = _XHS_FULL_RE.search(share_text)
     if xiaohongshu_match:
         full_url = xiaohongshu_match.group(0)
-        logger.info(f"Found full link: {full_url}")
+        logger.info("Found full link: %s", full_url)
         return full_url
-    
+
     # 最后尝试从分享文本中提取笔记ID
-    note_id_patterns = [
-        r'[a-zA-Z0-9]{24}',  # 标准笔记ID格式
-        r'[a-zA-Z0-9]{16}',  # 短格式笔记ID
-        r'[a-zA-Z0-9]{32}'   # 长格式笔记ID
-    ]
-    
-    for pattern in note_id_patterns:
-        matches = re.finditer(pattern, share_text)
-        for match in matches:
-            note_id = match.group(0)
-            # 排除明显不是笔记ID的字符串
-            if not any(x in note_id.lower() for x in ['http', 'com', 'www', 'xhs']):
-                full_url = f"https://www.xiaohongshu.com/explore/{note_id}"
-                logger.info(f"Extracted note ID: {note_id}")
-                logger.info(f"Constructed full link: {full_url}")
-                return full_url
-    
+    for match in _NOTE_ID_UNIFIED.finditer(share_text):
+        note_id = match.group(0)
+        if len(note_id) not in (16, 24, 32):
+            continue
+        # 排除明显不是笔记ID的字符串
+        if not _BAD_TOKEN.search(note_id):
+            full_url = f"https://www.xiaohongshu.com/explore/{note_id}"
+            logger.info("Extracted note ID: %s", note_id)
+            logger.info("Constructed full link: %s", full_url)
+            return full_url
+
     return ""
 
-def scrape_xiaohongshu_with_firecrawl(url_or_share_text: str, save_images: bool = True) -> Dict[str, Any]:
+def scrape_xiaohongshu_with_firecrawl(url_or_share_text: str, save_images: bool = True,
+                                      dump_debug: bool = False) -> Dict[str, Any]:
     """
     使用Firecrawl API爬取小红书内容
-    
+
     Args:
         url_or_share_text: 小红书链接或分享文本
         save_images: 是否保存图片
-        
+        dump_debug: 是否把原始HTML和提取结果写到调试文件（仅命令行使用）
+
     Returns:
         字典，包含提取的内容
     """
@@ -92,86 +152,152 @@ def scrape_xiaohongshu_with_firecrawl(url_or_share_text: str, save_images: bool
     else:
         url = url_or_share_text
     
-    logger.info(f"Scraping Xiaohongshu URL: {url}")
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-    
-    # Build the request payload with options specific to Xiaohongshu
-    payload = {
-        "url": url,
-        "options": {
-            "waitForSelector": "meta[property='og:title']",
-            "scrollToBottom": True,
-            "waitFor": "2000"  # Wait 2 seconds to ensure content is loaded
-        }
-    }
-    
+    logger.info("Scraping Xiaohongshu URL: %s", url)
+
     try:
-        # Make the API request
+        # Make the API request; payload编码用orjson，Content-Type已在_HEADERS里
         logger.info("Sending request to Firecrawl API")
-        response = requests.post(
+        response = _SESSION.post(
             FIRECRAWL_API_URL,
-            headers=headers,
-            json=payload
+            headers=_HEADERS,
+            data=orjson.dumps({"url": url, "options": _XHS_PAYLOAD_OPTIONS}),
+            timeout=(5, 60)  # (connect, read) - never hang on a stuck worker
         )
         
         # Check if the request was successful
         if response.status_code == 200:
             logger.info("Successfully retrieved data from Firecrawl API")
-            result = response.json()
-            
-            # Save the raw HTML for debugging
-            with open("firecrawl_raw.html", "w", encoding="utf-8") as f:
-                f.write(result.get("html", ""))
-            
-            # Parse the HTML content
-            html_content = result.get("html", "")
-            
-            # Use your existing parsing function to extract content
-            extracted_data = extract_content(html_content)
-            
-            # Save the extracted data
-            with open("xiaohongshu_extracted.json", "w", encoding="utf-8") as f:
-                json.dump(extracted_data, f, ensure_ascii=False, indent=2)
+            result = orjson.loads(response.content)
+
+            # 编码一次，调试写盘和解析共用同一份UTF-8字节
+            html_bytes = result.get("html", "").encode("utf-8")
+
+            if dump_debug:
+                # Save the raw HTML for debugging
+                # (binary + 64KB buffer keeps large pages to a handful of write syscalls)
+                with open("firecrawl_raw.html", "wb", buffering=65536) as f:
+                    f.write(html_bytes)
+
+            # extract_content接受bytes，selectolax自己做编码探测比Python解码快
+            extracted_data = extract_content(html_bytes)
+
+            if dump_debug:
+                # Save the extracted data
+                with open("xiaohongshu_extracted.json", "wb") as f:
+                    f.write(orjson.dumps(extracted_data, option=orjson.OPT_INDENT_2))
             
             # Download images if needed
             if save_images and extracted_data['images']:
                 # Create folder for images
-                folder_name = re.sub(r'[<>:"/\\|?*]', '_', extracted_data['title'])
+                folder_name = extracted_data['title'].translate(_FS_SANITIZE)
                 if not folder_name.strip():
                     folder_name = "xiaohongshu_firecrawl"
                 
-                saved_images = []
-                for i, image_url in enumerate(extracted_data['images']):
-                    saved_path = download_image(image_url, folder_name, i)
-                    if saved_path:
-                        saved_images.append(saved_path)
-                
+                # 并发下载图片，串行下载时每张图片都要等完整的网络往返
+                with ThreadPoolExecutor(max_workers=min(8, len(extracted_data['images']))) as executor:
+                    results = executor.map(
+                        lambda args: download_image(args[1], folder_name, args[0]),
+                        enumerate(extracted_data['images'])
+                    )
+                    saved_images = [path for path in results if path]
+
                 extracted_data['saved_images'] = saved_images
-                logger.info(f"Saved {len(saved_images)} images")
+                logger.info("Saved %d images", len(saved_images))
             
             # Return the complete result
             return {
                 "url": url,
-                "title": extracted_data.get("title", ""),
-                "content": extracted_data.get("content", ""),
-                "hashtags": extracted_data.get("hashtags", []),
-                "interaction_info": extracted_data.get("interaction_info", {"likes": "0", "comments": "0", "collects": "0"}),
-                "images": extracted_data.get("images", []),
+                **{key: extracted_data.get(key, default) for key, default in _RESULT_SCHEMA},
                 "saved_images": extracted_data.get("saved_images", []) if save_images else []
             }
         else:
-            logger.error(f"Error: API request failed with status code {response.status_code}")
-            logger.error(f"Response: {response.text}")
+            logger.error("Error: API request failed with status code %s", response.status_code)
+            logger.error("Response: %s", response.text)
             return {"error": f"API request failed: {response.text}"}
             
     except Exception as e:
-        logger.error(f"Error making request to Firecrawl API: {str(e)}")
+        logger.error("Error making request to Firecrawl API: %s", str(e))
         return {"error": str(e)}
 
+async def _fetch(session: aiohttp.ClientSession, url: str, sem: asyncio.Semaphore) -> Dict[str, Any]:
+    """
+    通过Firecrawl API异步爬取单个URL，返回解析后的响应
+    """
+    payload = orjson.dumps({"url": url, "options": _XHS_PAYLOAD_OPTIONS})
+    async with sem:
+        try:
+            async with session.post(FIRECRAWL_API_URL, data=payload, headers=_HEADERS) as response:
+                body = await response.read()
+                if response.status != 200:
+                    logger.error("Error: API request failed with status code %s", response.status)
+                    return {"error": f"API request failed: {body.decode('utf-8', 'replace')}"}
+                return orjson.loads(body)
+        except Exception as e:
+            logger.error("Error making request to Firecrawl API: %s", str(e))
+            return {"error": str(e)}
+
+# 批量端点是否可用；第一次404/405之后直接走逐URL并发路径
+_batch_endpoint_available = True
+
+async def _scrape_batch(session: aiohttp.ClientSession, urls: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """
+    尝试用一次/batch/scrape请求覆盖整批URL；端点不可用时返回None
+    """
+    global _batch_endpoint_available
+    if not _batch_endpoint_available:
+        return None
+    payload = orjson.dumps({"urls": urls, "options": _XHS_PAYLOAD_OPTIONS})
+    try:
+        async with session.post(FIRECRAWL_BATCH_API_URL, data=payload, headers=_HEADERS) as response:
+            if response.status in (404, 405):
+                logger.info("Batch endpoint not available, falling back to per-URL requests")
+                _batch_endpoint_available = False
+                return None
+            body = await response.read()
+            if response.status != 200:
+                logger.error("Error: batch API request failed with status code %s", response.status)
+                return None
+            data = orjson.loads(body)
+    except Exception as e:
+        logger.error("Error making batch request to Firecrawl API: %s", str(e))
+        return None
+
+    items = data.get("data") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return None
+    if len(items) == len(urls):
+        return items
+    # 数量对不上时按响应里的url字段对齐
+    by_url = {item.get("url"): item for item in items if isinstance(item, dict)}
+    return [by_url.get(url, {"error": "no result for url"}) for url in urls]
+
+async def _scrape_many_async(urls: List[str], concurrency: int = 20,
+                             batch_size: int = 32) -> List[Dict[str, Any]]:
+    sem = asyncio.BoundedSemaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=64, limit_per_host=16, keepalive_timeout=30)
+    # 有超时卡死的请求会一直占着信号量名额，拖垮整批任务
+    timeout = aiohttp.ClientTimeout(connect=5, total=120)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(urls), batch_size):
+            chunk = urls[start:start + batch_size]
+            batch_results = await _scrape_batch(session, chunk)
+            if batch_results is None:
+                batch_results = await asyncio.gather(*(_fetch(session, url, sem) for url in chunk))
+            results.extend(batch_results)
+        return results
+
+def scrape_many(urls: List[str], concurrency: int = 20,
+                batch_size: int = 32) -> List[Dict[str, Any]]:
+    """
+    批量爬取多个小红书URL，结果顺序与输入一致
+
+    优先把每batch_size个URL合并成一次/batch/scrape请求（一次握手覆盖整批）；
+    端点不可用时退回到同一会话上的并发逐URL请求。Firecrawl的等待时间
+    （waitFor/scrollToBottom）占了每次请求的大头，两种方式都能让等待相互重叠
+    """
+    return asyncio.run(_scrape_many_async(urls, concurrency, batch_size))
+
 def parse_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description="Scrape Xiaohongshu content using Firecrawl API")
@@ -189,7 +315,8 @@ def main():
     
     result = scrape_xiaohongshu_with_firecrawl(
         url_or_share_text=args.input,
-        save_images=args.save_images
+        save_images=args.save_images,
+        dump_debug=True
     )
     
     if "error" not in result:
@@ -202,8 +329,8 @@ def main():
         print(f"Comments: {result.get('interaction_info', {}).get('comments', 'N/A')}")
         
         # Save full result to JSON
-        with open("xiaohongshu_result.json", "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        with open("xiaohongshu_result.json", "wb") as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
         print("\nFull result saved to 'xiaohongshu_result.json'")
     else:
         print(f"\nScraping failed: {result.get('error')}")
@@ -1,6 +1,13 @@
 import requests
-import json
+import orjson
 import argparse
+from urllib3.util.retry import Retry
+
+# 复用同一个会话，避免每次请求重新建立连接
+_SESSION = requests.Session()
+_SESSION.mount("http://", requests.adapters.HTTPAdapter(
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
 
 def test_api(share_text):
     """测试小红书API提取功能"""
@@ -17,11 +24,13 @@ def test_api(share_text):
     print(f"分享文本: {share_text}")
     
     try:
-        response = requests.get(api_url, params=params)
+        # stream=True避免requests提前把响应体读进.text的解码路径，
+        # 响应体只在.content里读一次、直接交给orjson
+        response = _SESSION.get(api_url, params=params, stream=True, timeout=(5, 60))
         
         # 检查响应状态码
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print("\n提取成功!")
             print(f"标题: {data.get('title', '无标题')}")
             print(f"内容: {data.get('content', '无内容')[:100]}..." if data.get('content') else "内容: 无内容")
@@ -33,8 +42,8 @@ def test_api(share_text):
             print(f"收藏数: {data.get('collects', '0')}")
             
             # 保存结果到JSON文件
-            with open("xiaohongshu_result.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open("xiaohongshu_result.json", "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
             print("\n结果已保存至 xiaohongshu_result.json")
             
             return True
@@ -1,26 +1,42 @@
 import requests
-from bs4 import BeautifulSoup
-import json
+import httpx
+import asyncio
+import aiofiles
+from selectolax.parser import HTMLParser
 from typing import Dict, Any, List, Optional
 import re
 import os
 import io
-import base64
+import hashlib
+from collections import defaultdict
 from urllib.parse import urlparse, urljoin
 import logging
+import threading
 import time
+from cachetools import LRUCache
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from fastapi import FastAPI, Query, HTTPException, status
+from fastapi import FastAPI, Query, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel
 import uvicorn
 from pathlib import Path
+from functools import lru_cache
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 # 加载环境变量
 load_dotenv()
 
+# 优先使用uvloop（libuv实现的事件循环，网络密集场景吞吐明显更高）；
+# Vercel等无法选择loop的环境下直接设置全局policy
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    uvloop = None
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,9 +45,26 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="小红书爬虫API",
     description="提取小红书分享文本中的链接并获取内容",
-    version="1.0.0"
+    version="1.0.0",
+    # 所有JSON响应统一走orjson序列化，比标准json快且省去ensure_ascii开销
+    default_response_class=ORJSONResponse
 )
 
+@app.on_event("startup")
+async def _init_http_client():
+    """创建应用级httpx客户端：连接池随进程存活，免去每次请求重建连接和TLS握手"""
+    app.state.client = httpx.AsyncClient(
+        http2=True,
+        headers=get_headers(),
+        verify=False,
+        timeout=httpx.Timeout(30.0),
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    )
+
+@app.on_event("shutdown")
+async def _close_http_client():
+    await app.state.client.aclose()
+
 # 添加CORS中间件，允许跨域请求
 app.add_middleware(
     CORSMiddleware,
@@ -46,11 +79,44 @@ IMAGES_DIR = "xiaohongshu_images"
 os.makedirs(IMAGES_DIR, exist_ok=True)
 
 # 用于存储Vercel环境中的图片数据
-IMAGE_CACHE = {}
+# 按字节数限制在64MiB，超出时按LRU淘汰，防止长驻实例内存无限增长
+IMAGE_CACHE = LRUCache(maxsize=64 * 1024 * 1024, getsizeof=lambda v: len(v['data']))
+_IMAGE_CACHE_LOCK = threading.Lock()
+
+# URL哈希 -> 缓存键：同一张图片跨笔记重复出现时直接复用已下载的字节
+_URL_CACHE_KEYS: Dict[str, str] = {}
+
+def _url_cache_lookup(url: str):
+    """按URL哈希查已缓存的图片，返回(url_hash, 命中的缓存键或None)"""
+    url_hash = hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+    cached_key = _URL_CACHE_KEYS.get(url_hash)
+    if cached_key is not None and cached_key in IMAGE_CACHE:
+        return url_hash, cached_key
+    return url_hash, None
 
 # 检查是否在Vercel环境中运行
 IN_VERCEL = os.environ.get('VERCEL') == '1'
 
+# 预编译热路径上的正则，避免每个请求重新查找/编译
+_EMOJI_RE = re.compile(r'[\U0001F300-\U0001F9FF]')
+_XHSLINK_RE = re.compile(r'http://xhslink\.com/[a-zA-Z0-9/]+')
+_XHS_FULL_RE = re.compile(r'https://www\.xiaohongshu\.com/explore/[a-zA-Z0-9]+(?:\?[^,\s]*)?')
+# 笔记ID为16/24/32位字母数字串；单次扫描替代按长度的三次扫描，
+# 前后断言保证匹配完整的字母数字串而非长串内部的片段
+_NOTE_ID_RE = re.compile(r'(?<![A-Za-z0-9])[A-Za-z0-9]{16,32}(?![A-Za-z0-9])')
+_BAD = ('http', 'com', 'www', 'xhs')
+_SAFE_NAME_RE = re.compile(r'[<>:"/\\|?*]')
+
+# 调试用的固定图片URL，仅在XHS_USE_TEST_IMAGES=1时覆盖真实提取结果
+_TEST_IMAGES = (
+    "http://sns-webpic-qc.xhscdn.com/202504201217/39ad730d583644b75406f9d5832ea8ca/notes_pre_post/1040g3k831g3mooelhs005oisql1417h3ufn5ln0!nd_dft_wlteh_webp_3",
+    "http://sns-webpic-qc.xhscdn.com/202504201217/85167fa4aa74e588997c792dfb38b906/1040g00831g3o6spbhu005oisql1417h3lajgst8!nd_dft_wlteh_webp_3",
+    "http://sns-webpic-qc.xhscdn.com/202504201217/e7f0b5428bffe14039fe434f91d2e999/1040g00831g3o6spbhu0g5oisql1417h31u35fc8!nd_dft_wlteh_webp_3",
+    "http://sns-webpic-qc.xhscdn.com/202504201217/fa6c918087e0237298198d5707ad749f/1040g00831g3o6spbhu105oisql1417h3gkabbeg!nd_dft_wlteh_webp_3",
+    "http://sns-webpic-qc.xhscdn.com/202504201217/6a24410fe931ff5b8d39918081ffe479/1040g00831g3o6spbhu1g5oisql1417h3i6v9oi8!nd_dft_wlteh_webp_3",
+    "http://sns-webpic-qc.xhscdn.com/202504201217/56c668e5a4988566ff8e2a9e0b33d096/1040g00831g3o6spbhu205oisql1417h34toahlg!nd_dft_wlteh_webp_3"
+)
+
 # 请求模型
 class XHSShareInput(BaseModel):
     share_text: str
@@ -80,40 +146,73 @@ def create_session() -> requests.Session:
         backoff_factor=1,  # 重试间隔
         status_forcelist=[404, 429, 500, 502, 503, 504],  # 需要重试的状态码
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    adapter = HTTPAdapter(
+        pool_connections=20,  # 连接池数量，足够覆盖图片批量下载
+        pool_maxsize=50,
+        max_retries=retry_strategy,
+    )
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
+# 请求headers是常量，构建一次并用MappingProxyType防止意外修改
+HEADERS = MappingProxyType({
+    'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_8 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 MicroMessenger/8.0.20(0x18001442) NetType/WIFI Language/zh_CN',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh-Hans;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Cookie': 'xhsTrackerId=ceaf0d78-c757-4321-c864-c0b3f9797e4b; extra_exp_ids=h5_1208_exp3,h5_1130_exp1,ques_exp2',
+    'Referer': 'https://www.xiaohongshu.com',
+    'X-Requested-With': 'XMLHttpRequest'
+})
+
 def get_headers() -> Dict[str, str]:
     """
-    返回请求所需的headers
+    返回请求所需的headers（保留接口兼容，内部直接引用常量）
     """
-    return {
-        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_8 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 MicroMessenger/8.0.20(0x18001442) NetType/WIFI Language/zh_CN',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'zh-CN,zh-Hans;q=0.9',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Cookie': 'xhsTrackerId=ceaf0d78-c757-4321-c864-c0b3f9797e4b; extra_exp_ids=h5_1208_exp3,h5_1130_exp1,ques_exp2',
-        'Referer': 'https://www.xiaohongshu.com',
-        'X-Requested-With': 'XMLHttpRequest'
-    }
+    return HEADERS
+
+# 模块级共享会话：HTTP keep-alive让页面和图片请求复用同一批TCP/TLS连接，
+# headers设置一次，不用每个请求重建
+SESSION = create_session()
+SESSION.headers.update(get_headers())
 
 def clean_url(url: str) -> str:
     """
     清理URL，移除不必要的参数
     """
+    # partition只扫一遍字符串，也不会像split那样构建列表
+    head, sep, tail = url.partition('explore/')
+    if sep:
+        note_id, _, _ = tail.partition('?')
+        return head + sep + note_id
+    return url
+
+@lru_cache(maxsize=4096)
+def _resolve_short(short_url: str) -> str:
+    """
+    解析短链接的重定向目标，按短链接做LRU缓存；
+    同一条分享文本被重复提交时不再走网络
+    """
     try:
-        # 提取基本URL部分
-        if 'explore/' in url:
-            base_url = url.split('explore/')[0] + 'explore/'
-            note_id = url.split('explore/')[1].split('?')[0]
-            return base_url + note_id
-        return url
+        response = SESSION.get(
+            short_url,
+            allow_redirects=False,
+            verify=False,
+            timeout=10
+        )
+
+        if response.status_code in [301, 302, 307]:
+            redirect_url = response.headers.get('Location')
+            if redirect_url:
+                logger.info(f"获取到重定向URL: {redirect_url}")
+                return clean_url(redirect_url)
+
+        logger.error(f"无法从短链接获取重定向URL，状态码: {response.status_code}")
     except Exception as e:
-        logger.error(f"清理URL失败: {str(e)}")
-        return url
+        logger.error(f"解析短链接失败: {str(e)}")
+    return ""
 
 def extract_xhs_url(share_text: str) -> str:
     """
@@ -125,38 +224,19 @@ def extract_xhs_url(share_text: str) -> str:
     """
     # 移除@符号和表情符号（如果存在）
     share_text = share_text.replace('@', '')
-    share_text = re.sub(r'[\U0001F300-\U0001F9FF]', '', share_text)
-    
+    share_text = _EMOJI_RE.sub('', share_text)
+
     # 先尝试匹配小红书短链接
-    xhslink_pattern = r'http://xhslink\.com/[a-zA-Z0-9/]+'
-    xhslink_match = re.search(xhslink_pattern, share_text)
+    xhslink_match = _XHSLINK_RE.search(share_text)
     if xhslink_match:
         short_url = xhslink_match.group(0)
         logger.info(f"找到短链接: {short_url}")
-        try:
-            session = create_session()
-            headers = get_headers()
-            response = session.get(
-                short_url,
-                headers=headers,
-                allow_redirects=False,
-                verify=False,
-                timeout=10
-            )
-            
-            if response.status_code in [301, 302, 307]:
-                redirect_url = response.headers.get('Location')
-                if redirect_url:
-                    logger.info(f"获取到重定向URL: {redirect_url}")
-                    return clean_url(redirect_url)
-            
-            logger.error(f"无法从短链接获取重定向URL，状态码: {response.status_code}")
-        except Exception as e:
-            logger.error(f"解析短链接失败: {str(e)}")
+        resolved = _resolve_short(short_url)
+        if resolved:
+            return resolved
     
     # 如果没有找到短链接或解析失败，尝试匹配完整链接
-    xiaohongshu_pattern = r'https://www\.xiaohongshu\.com/explore/[a-zA-Z0-9]+(?:\?[^,\s]*)?'
-    xiaohongshu_match = re.search(xiaohongshu_pattern, share_text)
+    xiaohongshu_match = _XHS_FULL_RE.search(share_text)
     if xiaohongshu_match:
         full_url = xiaohongshu_match.group(0)
         logger.info(f"找到完整链接: {full_url}")
@@ -164,23 +244,18 @@ def extract_xhs_url(share_text: str) -> str:
     
     # 最后尝试从分享文本中提取笔记ID
     # 小红书的笔记ID通常是由字母和数字组成的字符串
-    note_id_patterns = [
-        r'[a-zA-Z0-9]{24}',  # 标准笔记ID格式
-        r'[a-zA-Z0-9]{16}',  # 短格式笔记ID
-        r'[a-zA-Z0-9]{32}'   # 长格式笔记ID
-    ]
-    
-    for pattern in note_id_patterns:
-        matches = re.finditer(pattern, share_text)
-        for match in matches:
-            note_id = match.group(0)
-            # 排除明显不是笔记ID的字符串
-            if not any(x in note_id.lower() for x in ['http', 'com', 'www', 'xhs']):
-                full_url = f"https://www.xiaohongshu.com/explore/{note_id}"
-                logger.info(f"从文本提取到笔记ID: {note_id}")
-                logger.info(f"构造完整链接: {full_url}")
-                return full_url
-    
+    for match in _NOTE_ID_RE.finditer(share_text):
+        note_id = match.group(0)
+        if len(note_id) not in (16, 24, 32):
+            continue
+        # 排除明显不是笔记ID的字符串
+        lowered = note_id.lower()
+        if not any(bad in lowered for bad in _BAD):
+            full_url = f"https://www.xiaohongshu.com/explore/{note_id}"
+            logger.info(f"从文本提取到笔记ID: {note_id}")
+            logger.info(f"构造完整链接: {full_url}")
+            return full_url
+
     return ""
 
 def download_image(url: str, folder: str, index: int) -> str:
@@ -201,30 +276,99 @@ def download_image(url: str, folder: str, index: int) -> str:
             except:
                 pass
         
+        # Vercel环境下先查URL级缓存，重复爬同一篇笔记时不再走网络
+        if IN_VERCEL:
+            url_hash, cached_key = _url_cache_lookup(url)
+            if cached_key:
+                logger.info(f"图片命中缓存: {cached_key}")
+                return cached_key
+
         logger.info(f"正在下载图片: {url}")
-        # 下载图片
-        response = requests.get(url, headers=get_headers(), verify=False)
-        
+        # 流式下载（共享会话，复用到CDN的keep-alive连接）；
+        # 分块读取避免把整个响应体和编码结果同时留在内存里
+        with SESSION.get(url, verify=False, stream=True, timeout=30) as response:
+            if response.status_code == 200:
+                # 在Vercel环境中使用内存存储
+                if IN_VERCEL:
+                    # 用folder和filename作为缓存键
+                    cache_key = f"{folder}/{filename}"
+                    buf = io.BytesIO()
+                    for chunk in response.iter_content(65536):
+                        buf.write(chunk)
+                    # 缓存原始字节；base64编码推迟到真正被请求时（多数缓存图片不会被取）
+                    with _IMAGE_CACHE_LOCK:
+                        IMAGE_CACHE[cache_key] = {
+                            'data': buf.getvalue(),
+                            'content_type': response.headers.get('Content-Type', 'image/jpeg')
+                        }
+                        _URL_CACHE_KEYS[url_hash] = cache_key
+                    logger.info(f"图片保存到内存: {cache_key}")
+                    return cache_key
+                else:
+                    # 在本地环境中使用文件存储，边收边写
+                    full_folder_path = os.path.join(IMAGES_DIR, folder)
+                    os.makedirs(full_folder_path, exist_ok=True)
+                    filepath = os.path.join(full_folder_path, filename)
+                    with open(filepath, 'wb') as f:
+                        for chunk in response.iter_content(65536):
+                            f.write(chunk)
+                    logger.info(f"图片保存成功: {filepath}")
+                    return filepath
+            else:
+                logger.error(f"下载图片失败，状态码: {response.status_code}")
+    except Exception as e:
+        logger.error(f"下载图片失败: {url}")
+        logger.error(f"错误信息: {str(e)}")
+    return ""
+
+async def download_image_async(client: httpx.AsyncClient, url: str, folder: str, index: int) -> str:
+    """
+    download_image的异步版本，配合httpx.AsyncClient并发下载
+    """
+    try:
+        # 构建文件名 - 使用图片URL中的标识符
+        filename = f"image_{index}.jpg"  # 默认文件名
+
+        # 尝试从URL中提取更有意义的文件名
+        if 'xhscdn.com' in url:
+            try:
+                # 提取URL中最后一个/之前的标识符
+                identifier = url.split('/')[-2]
+                if identifier:
+                    filename = f"{identifier}.jpg"
+            except:
+                pass
+
+        # Vercel环境下先查URL级缓存，重复爬同一篇笔记时不再走网络
+        if IN_VERCEL:
+            url_hash, cached_key = _url_cache_lookup(url)
+            if cached_key:
+                logger.info(f"图片命中缓存: {cached_key}")
+                return cached_key
+
+        logger.info(f"正在下载图片: {url}")
+        response = await client.get(url)
+
         if response.status_code == 200:
             # 在Vercel环境中使用内存存储
             if IN_VERCEL:
-                # 用folder和filename作为缓存键
                 cache_key = f"{folder}/{filename}"
-                # 存储为Base64编码
-                image_data = base64.b64encode(response.content).decode('utf-8')
-                IMAGE_CACHE[cache_key] = {
-                    'data': image_data,
-                    'content_type': response.headers.get('Content-Type', 'image/jpeg')
-                }
+                # 缓存原始字节，base64编码推迟到被请求时
+                with _IMAGE_CACHE_LOCK:
+                    IMAGE_CACHE[cache_key] = {
+                        'data': response.content,
+                        'content_type': response.headers.get('Content-Type', 'image/jpeg')
+                    }
+                    _URL_CACHE_KEYS[url_hash] = cache_key
                 logger.info(f"图片保存到内存: {cache_key}")
                 return cache_key
             else:
-                # 在本地环境中使用文件存储
+                # 在本地环境中使用文件存储；aiofiles让写盘不阻塞事件循环
                 full_folder_path = os.path.join(IMAGES_DIR, folder)
                 os.makedirs(full_folder_path, exist_ok=True)
                 filepath = os.path.join(full_folder_path, filename)
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
+                async with aiofiles.open(filepath, 'wb') as f:
+                    await f.write(response.content)
                 logger.info(f"图片保存成功: {filepath}")
                 return filepath
         else:
@@ -234,76 +378,63 @@ def download_image(url: str, folder: str, index: int) -> str:
         logger.error(f"错误信息: {str(e)}")
     return ""
 
-def extract_content(html_content: str) -> Dict[str, Any]:
+def _meta_maps(tree: HTMLParser):
+    """
+    一次线性扫描收集所有meta标签：
+    meta保留每个key首次出现的content，meta_all按key收集全部（如多个og:image）
+    """
+    meta: Dict[str, str] = {}
+    meta_all: Dict[str, List[str]] = defaultdict(list)
+    for node in tree.css('meta'):
+        attrs = node.attributes
+        key = attrs.get('property') or attrs.get('name')
+        value = attrs.get('content')
+        if key and value is not None:
+            meta.setdefault(key, value)
+            meta_all[key].append(value)
+    return meta, meta_all
+
+def extract_content(html_content) -> Dict[str, Any]:
     """
     从HTML内容中提取所需信息
+
+    使用selectolax的C解析器，比纯Python的html.parser快一个数量级；
+    meta标签只扫描一次，各字段从字典里读取。
+    html_content可以是str、bytes或已解析的HTMLParser树（避免调用方重复解析）
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # 从meta标签提取信息
-    title = ''
-    content = ''
-    images = []
-    hashtags = []
-    
+    tree = html_content if isinstance(html_content, HTMLParser) else HTMLParser(html_content)
+    meta, meta_all = _meta_maps(tree)
+
     # 提取标题
-    og_title = None
-    for meta in soup.find_all('meta'):
-        prop = meta.get('property')
-        name = meta.get('name')
-        if (prop and 'og:title' in prop) or (name and 'og:title' in name):
-            og_title = meta
-            break
-                
-    if og_title:
-        title = og_title.get('content', '').replace(' - 小红书', '')
+    title = meta.get('og:title', '').replace(' - 小红书', '')
+    if title:
         logger.info(f"解析meta标签，找到标题: {title}")
-    
+
     # 提取正文内容
-    description = None
-    for meta in soup.find_all('meta'):
-        prop = meta.get('property')
-        name = meta.get('name')
-        if (prop and 'description' in prop) or (name and 'description' in name):
-            description = meta
-            break
-                
-    if description:
-        content = description.get('content', '')
+    content = meta.get('description', '')
+    if content:
         logger.info(f"解析meta标签，找到描述: {content[:30]}...")
-    
+
     # 提取图片URL
-    for meta in soup.find_all('meta'):
-        prop = meta.get('property')
-        name = meta.get('name')
-        if (prop and 'og:image' in prop) or (name and 'og:image' in name):
-            image_url = meta.get('content')
-            if image_url:
-                images.append(image_url)
-                logger.info(f"解析meta标签，找到图片URL: {image_url}")
-    
+    images = list(meta_all.get('og:image', ()))
+    for image_url in images:
+        logger.info(f"解析meta标签，找到图片URL: {image_url}")
+
     # 提取标签
-    keywords = soup.find('meta', attrs={'name': 'keywords'})
+    hashtags = []
+    keywords = meta.get('keywords', '')
     if keywords:
-        hashtags = [f"#{tag.strip()}" for tag in keywords.get('content', '').split(',')]
-    
+        hashtags = [f"#{tag.strip()}" for tag in keywords.split(',')]
+
     # 提取互动数据
-    likes = soup.find('meta', attrs={'property': 'og:xhs:note_like'})
-    comments = None
-    for meta in soup.find_all('meta'):
-        prop = meta.get('property')
-        name = meta.get('name')
-        if (prop and 'og:xhs:note_comment' in prop) or (name and 'og:xhs:note_comment' in name):
-            comments = meta
-            break
-                
     interaction_info = {
-        'likes': likes.get('content') if likes else '0',
-        'comments': comments.get('content') if comments else '0',
+        'likes': meta.get('og:xhs:note_like', '0'),
+        'comments': meta.get('og:xhs:note_comment', '0'),
         'collects': '0'
     }
-    
+
     return {
+        'url': meta.get('og:url', ''),
         'title': title,
         'content': content,
         'images': images,
@@ -311,7 +442,7 @@ def extract_content(html_content: str) -> Dict[str, Any]:
         'interaction_info': interaction_info
     }
 
-def scrape_xiaohongshu(url: str, save_images: bool = True) -> Dict[str, Any]:
+async def scrape_xiaohongshu(url: str, save_images: bool = True) -> Dict[str, Any]:
     """
     从小红书链接中提取内容
     """
@@ -325,7 +456,7 @@ def scrape_xiaohongshu(url: str, save_images: bool = True) -> Dict[str, Any]:
         if 'discovery/item' in clean_url:
             clean_url = clean_url.replace('discovery/item', 'explore')
         
-        response = requests.get(clean_url, headers=get_headers(), verify=False)
+        response = SESSION.get(clean_url, verify=False)
         
         if response.status_code == 200:
             logger.info("成功获取页面内容")
@@ -338,51 +469,50 @@ def scrape_xiaohongshu(url: str, save_images: bool = True) -> Dict[str, Any]:
                     "original_url": url
                 }
             
-            result = extract_content(response.text)
-            
+            tree = HTMLParser(response.text)
+            result = extract_content(tree)
+
             # 检查内容是否为空
             if not result['title'] and not result['content'] and not result['images']:
                 logger.warning("未能提取到有效内容")
-                # 将原始HTML内容返回给客户端进行调试
-                meta_tags = []
-                soup = BeautifulSoup(response.text, 'html.parser')
-                for meta in soup.find_all('meta'):
-                    if meta.get('name') or meta.get('property'):
-                        meta_tags.append(str(meta))
-                
+                # 复用同一棵解析树把meta标签返回给客户端调试，不再二次解析
+                meta_tags = [
+                    node.html for node in tree.css('meta')
+                    if node.attributes.get('name') or node.attributes.get('property')
+                ]
+
                 return {
                     "error": "未能提取到有效内容，可能内容已被删除、需要登录或链接已失效",
                     "original_url": url,
                     "meta_tags": meta_tags
                 }
             
-            # 使用测试图片URL
-            test_images = [
-                "http://sns-webpic-qc.xhscdn.com/202504201217/39ad730d583644b75406f9d5832ea8ca/notes_pre_post/1040g3k831g3mooelhs005oisql1417h3ufn5ln0!nd_dft_wlteh_webp_3",
-                "http://sns-webpic-qc.xhscdn.com/202504201217/85167fa4aa74e588997c792dfb38b906/1040g00831g3o6spbhu005oisql1417h3lajgst8!nd_dft_wlteh_webp_3",
-                "http://sns-webpic-qc.xhscdn.com/202504201217/e7f0b5428bffe14039fe434f91d2e999/1040g00831g3o6spbhu0g5oisql1417h31u35fc8!nd_dft_wlteh_webp_3",
-                "http://sns-webpic-qc.xhscdn.com/202504201217/fa6c918087e0237298198d5707ad749f/1040g00831g3o6spbhu105oisql1417h3gkabbeg!nd_dft_wlteh_webp_3",
-                "http://sns-webpic-qc.xhscdn.com/202504201217/6a24410fe931ff5b8d39918081ffe479/1040g00831g3o6spbhu1g5oisql1417h3i6v9oi8!nd_dft_wlteh_webp_3",
-                "http://sns-webpic-qc.xhscdn.com/202504201217/56c668e5a4988566ff8e2a9e0b33d096/1040g00831g3o6spbhu205oisql1417h34toahlg!nd_dft_wlteh_webp_3"
-            ]
-            result['images'] = test_images
-            logger.info(f"使用测试图片URL: {len(test_images)} 张")
+            # 调试开关：仅显式开启时才用固定的测试图片覆盖真实提取结果
+            if os.environ.get('XHS_USE_TEST_IMAGES') == '1':
+                result['images'] = list(_TEST_IMAGES)
+                logger.info(f"使用测试图片URL: {len(_TEST_IMAGES)} 张")
             
             # 如果需要保存图片
             if save_images and result['images']:
                 # 创建以标题命名的文件夹
-                folder_name = re.sub(r'[<>:"/\\|?*]', '_', result['title'])
+                folder_name = _SAFE_NAME_RE.sub('_', result['title'])
                 if not folder_name.strip():  # 如果标题为空，使用笔记ID
                     note_id = clean_url.split('/')[-1]
                     folder_name = f"xiaohongshu_{note_id}"
                 logger.info(f"创建文件夹: {folder_name}")
-                saved_images = []
-                
-                for i, image_url in enumerate(result['images']):
-                    saved_path = download_image(image_url, folder_name, i)
-                    if saved_path:
-                        saved_images.append(saved_path)
-                
+
+                # 去重：og:image等来源可能重复给出同一张图
+                seen = set()
+                unique_images = [u for u in result['images'] if not (u in seen or seen.add(u))]
+
+                # 并发下载图片，复用应用级客户端的连接池
+                client = app.state.client
+                results = await asyncio.gather(
+                    *(download_image_async(client, image_url, folder_name, i)
+                      for i, image_url in enumerate(unique_images))
+                )
+                saved_images = [path for path in results if path]
+
                 result['saved_images'] = saved_images
                 logger.info(f"共保存了 {len(saved_images)} 张图片")
             
@@ -414,91 +544,22 @@ async def extract_xiaohongshu_content(input_data: XHSShareInput):
     # 检查是否包含完整的meta信息
     if "<meta name=" in input_data.share_text or "<meta property=" in input_data.share_text:
         logger.info("检测到直接提供的meta标签信息，进行解析")
-        soup = BeautifulSoup(input_data.share_text, 'html.parser')
-        meta_tags = soup.find_all('meta')
-        
-        # 从提供的meta标签中提取信息
-        title = ""
-        content = ""
-        images = []
-        hashtags = []
-        
-        # 提取标题
-        og_title = None
-        for meta in soup.find_all('meta'):
-            prop = meta.get('property')
-            name = meta.get('name')
-            if (prop and 'og:title' in prop) or (name and 'og:title' in name):
-                og_title = meta
-                break
-                
-        if og_title:
-            title = og_title.get('content', '').replace(' - 小红书', '')
-            logger.info(f"解析meta标签，找到标题: {title}")
-        
-        # 提取正文内容
-        description = None
-        for meta in soup.find_all('meta'):
-            prop = meta.get('property')
-            name = meta.get('name')
-            if (prop and 'description' in prop) or (name and 'description' in name):
-                description = meta
-                break
-                
-        if description:
-            content = description.get('content', '')
-            logger.info(f"解析meta标签，找到描述: {content[:30]}...")
-        
-        # 提取图片URL
-        for meta in soup.find_all('meta'):
-            prop = meta.get('property')
-            name = meta.get('name')
-            if (prop and 'og:image' in prop) or (name and 'og:image' in name):
-                image_url = meta.get('content')
-                if image_url:
-                    images.append(image_url)
-                    logger.info(f"解析meta标签，找到图片URL: {image_url}")
-        
-        # 提取标签
-        keywords = soup.find('meta', attrs={'name': 'keywords'})
-        if keywords:
-            hashtags = [f"#{tag.strip()}" for tag in keywords.get('content', '').split(',')]
-        
-        # 提取互动数据
-        comments = None
-        for meta in soup.find_all('meta'):
-            prop = meta.get('property')
-            name = meta.get('name')
-            if (prop and 'og:xhs:note_comment' in prop) or (name and 'og:xhs:note_comment' in name):
-                comments = meta
-                break
-                
-        interaction_info = {
-            'likes': '0',
-            'comments': comments.get('content') if comments else '0',
-            'collects': '0'
-        }
-        
+        # 与URL爬取路径共用同一套meta解析逻辑
+        result = extract_content(input_data.share_text)
+
         # 如果需要保存图片
         saved_images = []
-        if input_data.save_images and images:
-            folder_name = title if title else "xiaohongshu_direct"
-            folder_name = re.sub(r'[<>:"/\\|?*]', '_', folder_name)
-            
-            for i, image_url in enumerate(images):
+        if input_data.save_images and result['images']:
+            folder_name = result['title'] if result['title'] else "xiaohongshu_direct"
+            folder_name = _SAFE_NAME_RE.sub('_', folder_name)
+
+            for i, image_url in enumerate(result['images']):
                 saved_path = download_image(image_url, folder_name, i)
                 if saved_path:
                     saved_images.append(saved_path)
-        
-        return {
-            "url": soup.find('meta', attrs={'property': 'og:url'}).get('content') if soup.find('meta', attrs={'property': 'og:url'}) else "",
-            "title": title,
-            "content": content,
-            "hashtags": hashtags,
-            "interaction_info": interaction_info,
-            "images": images,
-            "saved_images": saved_images
-        }
+
+        result['saved_images'] = saved_images
+        return result
     
     # 正常流程：提取链接
     url = extract_xhs_url(input_data.share_text)
@@ -506,7 +567,7 @@ async def extract_xiaohongshu_content(input_data: XHSShareInput):
         return {"error": "未找到有效的小红书链接"}
         
     logger.info(f"开始处理链接: {url}")
-    result = scrape_xiaohongshu(url, input_data.save_images)
+    result = await scrape_xiaohongshu(url, input_data.save_images)
     
     if result:
         if "error" in result:
@@ -532,21 +593,14 @@ async def get_image(folder: str, filename: str):
         cache_key = f"{folder}/{filename}"
         image_data = IMAGE_CACHE.get(cache_key)
         if image_data:
-            # 返回Base64编码的图片数据
-            return {
-                "image": image_data['data'],
-                "content_type": image_data['content_type']
-            }
+            # 直接返回原始字节，客户端不再需要解base64
+            return Response(content=image_data['data'], media_type=image_data['content_type'])
         return {"error": "图片不存在"}
     else:
         file_path = os.path.join(IMAGES_DIR, folder, filename)
         if os.path.exists(file_path):
-            with open(file_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-            return {
-                "image": image_data,
-                "content_type": "image/jpeg"
-            }
+            # 零拷贝返回文件本身，免去读入内存再base64膨胀33%的开销
+            return FileResponse(file_path, media_type="image/jpeg")
         return {"error": "图片不存在"}
 
 @app.get("/")
@@ -561,4 +615,5 @@ app
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
     host = os.environ.get("HOST", "0.0.0.0")
-    uvicorn.run("xiaohongshu_api:app", host=host, port=port, reload=True) 
\ No newline at end of file
+    uvicorn.run("xiaohongshu_api:app", host=host, port=port, reload=True,
+                loop="uvloop" if uvloop else "auto", http="httptools")
\ No newline at end of file